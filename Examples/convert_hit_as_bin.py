@@ -1,4 +1,5 @@
 from glob import iglob
+from itertools import repeat
 from os.path import splitext, basename, getmtime, getctime
 from struct import Struct
 from time import sleep
@@ -6,7 +7,7 @@ from pprint import pprint
 
 from tqdm import tqdm
 
-from saclatools import hit_reader, scalars_at
+from saclatools import hit_reader, scalars_at, join_scalars
 
 
 # parameters!
@@ -22,16 +23,24 @@ equips = {  # must be correct for metadata retrieval
     # 'fel_intensity': ('xfel_bl_1_tc_gm_2_pd_fitting_peak/voltage', float),
     'delay_motor': ('xfel_bl_1_st_4_motor_22/position', float)
 }
+# shots to convert, e.g. `lambda meta: meta['fel_status'] & meta['laser_shutter']`; the shots missing in the
+# metadata are always dropped, and the others are all kept if None
+shot_filter = None
 
 
 def convert(ifile, ofile='exported.bin'):
     print("Getting tag list...")
-    tags = tuple(d['tag'] for d in hit_reader(ifile))  # get tag list
+    tags = tuple(d['tag'] for d in hit_reader(ifile, mask=repeat(False)))  # get tag list without decoding hits
     print("Tags: {}--{}".format(tags[0], tags[-1]))
 
     print("Getting metadata...")
     df = scalars_at(*tags, hightag=hightag, equips=equips)  # get SACLA meta data
     pprint(df.head())
+    meta = join_scalars(tags, df)  # align meta data to the tags
+    shots = ~meta['missing']  # filter shots
+    if shot_filter is not None:
+        shots &= shot_filter(meta)
+    print("Shots: {} of {} ({} missing in metadata)".format(shots.sum(), len(tags), meta['missing'].sum()))
 
     print("Writing a .bin file...")
     deep1 = Struct('=IBBBBddddI')
@@ -40,15 +49,16 @@ def convert(ifile, ofile='exported.bin'):
     pack2 = deep2.pack
     with open(ofile, 'bw') as f:
         write = f.write
-        for hits in tqdm(hit_reader(ifile), total=len(tags)):
-            meta = df.loc[hits['tag']]
+        for i, hits in enumerate(tqdm(hit_reader(ifile, mask=shots), total=len(tags))):
+            if not shots[i]:
+                continue
             write(pack1(hits['tag'],  # uint32
-                        meta['fel_status'],  # uint8
-                        meta['fel_shutter'],  # uint8
-                        meta['laser_shutter'],  # uint8
+                        int(meta['fel_status'][i]),  # uint8
+                        int(meta['fel_shutter'][i]),  # uint8
+                        int(meta['laser_shutter'][i]),  # uint8
                         0,  # uint8
-                        meta['fel_intensity'],  # float64
-                        meta['delay_motor'],  # float64
+                        meta['fel_intensity'][i],  # float64
+                        meta['delay_motor'][i],  # float64
                         0,  # float64
                         0,  # float64
                         hits.get('nhits', 0)))  # uint32
@@ -1,13 +1,13 @@
 from glob import iglob
 from os.path import splitext, basename, getmtime, getctime
-from itertools import chain
+from itertools import chain, repeat
 from time import sleep
 from pprint import pprint
 
 from h5py import File
 from pandas import DataFrame
 
-from saclatools import hit_reader, scalars_at
+from saclatools import hit_reader, scalars_at, join_scalars
 
 
 # parameters!
@@ -23,20 +23,31 @@ equips = {  # must be correct for metadata retrieval
     # 'fel_intensity_gm2': ('xfel_bl_1_tc_gm_2_pd_fitting_peak/voltage', float),
     'delay_motor': ('xfel_bl_1_st_4_motor_22/position', float)
 }
+# shots to convert, e.g. `lambda meta: meta['fel_status'] & meta['laser_shutter']`; the shots missing in the
+# metadata are always dropped, and the others are all kept if None
+shot_filter = None
 
 
 def convert(ifile, ofile='exported.h5'):
     print("Getting tag list...")
-    df = DataFrame(((d['tag'], d['nhits']) for d in hit_reader(ifile)), columns=('tag', 'nhits'))
-    cumsummed = df['nhits'].cumsum()
+    df = DataFrame(((d['tag'], d['nhits']) for d in hit_reader(ifile, mask=repeat(False))), columns=('tag', 'nhits'))
     pprint(df.head())
+    tags = df['tag'].values
 
     print("Getting metadata...")
-    meta = scalars_at(*df.index.values.tolist(), hightag=hightag, equips=equips)  # get SACLA meta data
+    meta = scalars_at(*tags.tolist(), hightag=hightag, equips=equips)  # get SACLA meta data
     pprint(meta.head())
+    meta = join_scalars(tags, meta)  # align meta data to the tags
+    shots = ~meta['missing']  # filter shots
+    if shot_filter is not None:
+        shots &= shot_filter(meta)
+    print("Shots: {} of {} ({} missing in metadata)".format(shots.sum(), len(tags), meta['missing'].sum()))
+    df = df[shots]
+    cumsummed = df['nhits'].cumsum()
 
     print("Getting hit list...")
-    hits = DataFrame(list(chain(*(d['hits'] for d in hit_reader(ifile)))))
+    hits = DataFrame(list(chain(*(d['hits'] for d in hit_reader(ifile, mask=shots) if 'hits' in d))),
+                     columns=('x', 'y', 't', 'method'), dtype='float64')
     pprint(hits.head())
 
     with File(ofile) as f:
@@ -46,8 +57,10 @@ def convert(ifile, ofile='exported.h5'):
         f['nlistpos'] = cumsummed - df['nhits']
         f['nions'] = df['nhits']
         f['Tagevent'] = df['tag']
-        for k, v in meta.iteritems():
-            f[k] = v
+        for k, v in meta.items():
+            if k in {'tag', 'missing'}:
+                continue
+            f[k] = v[shots]
     print("Done!")
 
 
@@ -1,11 +1,12 @@
 from glob import iglob
+from itertools import repeat
 from os.path import splitext, basename, getmtime, getctime
 
 from tqdm import tqdm
-from numpy import stack
+from numpy import stack, empty
 from h5py import File
 
-from saclatools import scalars_at, LmaReader
+from saclatools import scalars_at, join_scalars, LmaReader
 
 # parameters!
 lma_filename = "/UserData/uedalab/work.uedalab/2017B8050/lma_files/{}.lma".format
@@ -18,27 +19,42 @@ equips = {  # must be correct for metadata retrieval
     'fel_intensity': ('xfel_bl_1_tc_gm_1_pd_fitting_peak/voltage', float),
     'delay_motor': ('xfel_bl_1_st_4_motor_22/position', float)
 }
+# shots to convert, e.g. `lambda meta: meta['fel_status'] & meta['laser_shutter']`; the shots missing in the
+# metadata are always dropped, and the others are all kept if None
+shot_filter = None
 
 
 def convert(ifile, ofile='exported.h5'):
-    print("Reading lma file...")
+    print("Getting tag list...")
     with LmaReader(ifile) as r:
         keys = tuple("channel{}".format(i) for i in r.channels)
-        data: "List[dict]" = tuple(d for d in r)
+        nsamples = r.nsamples
+        tags = tuple(d['tag'] for d in r.read(mask=repeat(False)))  # get tag list without decoding pulses
 
     print("Getting SACLA metadata...")
-    tags = (d['tag'] for d in data)
-    meta = scalars_at(*tags, hightag=hightag, equips=equips)  # get SACLA meta data
+    df = scalars_at(*tags, hightag=hightag, equips=equips)  # get SACLA meta data
+    meta = join_scalars(tags, df)  # align meta data to the tags
+    shots = ~meta['missing']  # filter shots
+    if shot_filter is not None:
+        shots &= shot_filter(meta)
+    print("Shots: {} of {} ({} missing in metadata)".format(shots.sum(), len(tags), meta['missing'].sum()))
+
+    print("Reading lma file...")
+    with LmaReader(ifile) as r:
+        data: "List[dict]" = tuple(d for d, s in zip(r.read(mask=shots), shots) if s)
 
     print("Writing hdf file...")
     with File(ofile) as f:
-        f['tags'] = meta.index.values
+        f['tags'] = meta['tag'][shots]
         for k in keys:
             if k in {'channel7'}:
                 continue
+            if len(data) == 0:  # no shot to write
+                f[k] = empty((0, nsamples), dtype='float32')
+                continue
             f[k] = stack(tuple(d[k] for d in data)).astype('float32')
-        for k in meta:
-            f[k] = meta[k]
+        for k in df:
+            f[k] = meta[k][shots]
     print("Done!")
 
 
@@ -1,4 +1,5 @@
 from .bin_fmt import *
+from .delayline import *
 from .hittypes import *
 from .lma_fmt import *
 from .sacla_db import *
@@ -1,15 +1,19 @@
+from itertools import repeat
 from struct import Struct
-from typing import Generator
+from typing import Generator, Iterable
 
 __all__ = ['hit_reader', 'bin_reader']
 
 
-def hit_reader(filename) -> Generator[dict, None, None]:
+def hit_reader(filename, mask: Iterable[bool] = None) -> Generator[dict, None, None]:
     """
+    Hits of an event are skipped without decoding, if the event is masked out by `mask`, a sequence of bools for
+    each event in the file order. Raises ValueError if `mask` is shorter than the file.
     Example:
         for d in hit_reader('aq137.hit'):
             print(d)
             break
+        tags = [d['tag'] for d in hit_reader('aq137.hit', mask=repeat(False))]  # read tags only
     """
     deep1 = Struct('=IH')
     unpack1 = deep1.unpack
@@ -18,12 +22,24 @@ def hit_reader(filename) -> Generator[dict, None, None]:
     unpack2 = deep2.unpack
     size2 = deep2.size
 
+    if mask is None:
+        mask = repeat(True)
+    mask = iter(mask)
+
     with open(filename, 'br') as f:
         read = f.read
         seek = f.seek
         while read(1):
             seek(-1, 1)
             tag, nhits = unpack1(read(size1))
+            try:
+                selected = next(mask)
+            except StopIteration:
+                raise ValueError('Mask is shorter than the num of events in the file!') from None
+            if not selected:
+                seek(nhits * size2, 1)
+                yield {'tag': tag, 'nhits': nhits}
+                continue
             yield {
                 'tag': tag,
                 'nhits': nhits,
@@ -31,8 +47,10 @@ def hit_reader(filename) -> Generator[dict, None, None]:
             }
 
 
-def bin_reader(filename, keys=None) -> Generator[dict, None, None]:
+def bin_reader(filename, keys=None, mask: Iterable[bool] = None) -> Generator[dict, None, None]:
     """
+    Hits of an event are skipped without decoding, if the event is masked out by `mask`, a sequence of bools for
+    each event in the file order. Raises ValueError if `mask` is shorter than the file.
     Example:
         for d in bin_reader('aq137.bin'):
             print(d)
@@ -47,12 +65,24 @@ def bin_reader(filename, keys=None) -> Generator[dict, None, None]:
     unpack2 = deep2.unpack
     size2 = deep2.size
 
+    if mask is None:
+        mask = repeat(True)
+    mask = iter(mask)
+
     with open(filename, 'br') as f:
         read = f.read
         seek = f.seek
         while read(1):
             seek(-1, 1)
             tag, *meta, nhits = unpack1(read(size1))
+            try:
+                selected = next(mask)
+            except StopIteration:
+                raise ValueError('Mask is shorter than the num of events in the file!') from None
+            if not selected:
+                seek(nhits * size2, 1)
+                yield {'tag': tag, **dict(zip(keys, meta)), 'nhits': nhits}
+                continue
             yield {
                 'tag': tag,
                 **dict(zip(keys, meta)),
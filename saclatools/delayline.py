@@ -0,0 +1,248 @@
+from typing import Tuple
+
+from numba import jit, prange
+from numpy import ndarray, bool_, asarray, empty, zeros, cumsum, searchsorted, sort, argsort, int64, uint16, float64
+
+__all__ = ['METHOD_COMPLETE', 'METHOD_X1_RECOVERED', 'METHOD_X2_RECOVERED', 'METHOD_Y1_RECOVERED',
+           'METHOD_Y2_RECOVERED', 'METHOD_MCP_RECOVERED', 'reconstruct_hits']
+
+METHOD_COMPLETE = 0  # all of mcp, x1, x2, y1 and y2 are detected
+METHOD_X1_RECOVERED = 1  # x1 is missing and recovered from the time sum of x
+METHOD_X2_RECOVERED = 2
+METHOD_Y1_RECOVERED = 3
+METHOD_Y2_RECOVERED = 4
+METHOD_MCP_RECOVERED = 5  # mcp is missing and recovered from the time sums of both x and y
+
+
+@jit(nopython=True, nogil=True)
+def _nearest(arr: ndarray, used: ndarray, target: float, width: float) -> int:
+    """
+    Index of the unused element of the sorted `arr` nearest to `target` within `width`, or -1
+    """
+    lo = searchsorted(arr, target - width)
+    hi = searchsorted(arr, target + width, side='right')
+    found, dev = -1, width
+    for i in range(lo, hi):
+        if used[i]:
+            continue
+        d = abs(arr[i] - target)
+        if d <= dev:
+            found, dev = i, d
+    return found
+
+
+@jit(nopython=True, nogil=True)
+def _count(arr: ndarray, used: ndarray, fr: float, to: float) -> Tuple[int, int]:
+    """
+    Num of the unused elements of the sorted `arr` in [`fr`, `to`], and index of the first one of them or -1
+    """
+    lo = searchsorted(arr, fr)
+    hi = searchsorted(arr, to, side='right')
+    n, found = 0, -1
+    for i in range(lo, hi):
+        if not used[i]:
+            if found < 0:
+                found = i
+            n += 1
+    return n, found
+
+
+@jit(nopython=True, nogil=True)
+def _best_pair(a: ndarray, used_a: ndarray, b: ndarray, used_b: ndarray,
+               mcp: float, tsum: float, width: float) -> Tuple[int, int, float]:
+    """
+    Pair of unused anode ends (a, b) whose time sum a + b - 2 * mcp is nearest to `tsum` within `width`.
+    Only the a's in the window [mcp - width, mcp + tsum + width] are visited, and the b is looked up by bisection
+    """
+    lo = searchsorted(a, mcp - width)
+    hi = searchsorted(a, mcp + tsum + width, side='right')
+    found_a, found_b, dev = -1, -1, width
+    for i in range(lo, hi):
+        if used_a[i]:
+            continue
+        j = _nearest(b, used_b, tsum + 2 * mcp - a[i], width)
+        if j < 0:
+            continue
+        d = abs(a[i] + b[j] - 2 * mcp - tsum)
+        if d <= dev:
+            found_a, found_b, dev = i, j, d
+    return found_a, found_b, dev
+
+
+@jit(nopython=True, nogil=True)
+def _reconstruct_event(mcp: ndarray, x1: ndarray, x2: ndarray, y1: ndarray, y2: ndarray,
+                       t0: float, tsum_x: float, tsum_y: float, width: float, x_scale: float, y_scale: float,
+                       out_t: ndarray, out_x: ndarray, out_y: ndarray, out_method: ndarray) -> int:
+    mcp, x1, x2, y1, y2 = sort(mcp), sort(x1), sort(x2), sort(y1), sort(y2)
+    used_mcp = zeros(mcp.size, dtype=bool_)
+    used_x1, used_x2 = zeros(x1.size, dtype=bool_), zeros(x2.size, dtype=bool_)
+    used_y1, used_y2 = zeros(y1.size, dtype=bool_), zeros(y2.size, dtype=bool_)
+    n = 0
+
+    # 1st pass: hits with all the five signals
+    for k in range(mcp.size):
+        m = mcp[k]
+        ix1, ix2, _ = _best_pair(x1, used_x1, x2, used_x2, m, tsum_x, width)
+        if ix1 < 0:
+            continue
+        iy1, iy2, _ = _best_pair(y1, used_y1, y2, used_y2, m, tsum_y, width)
+        if iy1 < 0:
+            continue
+        used_mcp[k] = used_x1[ix1] = used_x2[ix2] = used_y1[iy1] = used_y2[iy2] = True
+        out_t[n] = m - t0
+        out_x[n] = x_scale * (x1[ix1] - x2[ix2])
+        out_y[n] = y_scale * (y1[iy1] - y2[iy2])
+        out_method[n] = METHOD_COMPLETE
+        n += 1
+
+    # 2nd pass: hits missing the mcp, which is recovered from the time sums of x and y
+    for i in range(x1.size):
+        if used_x1[i]:
+            continue
+        lo = searchsorted(x2, x1[i] - tsum_x - width)
+        hi = searchsorted(x2, x1[i] + tsum_x + width, side='right')
+        found_x2, found_y1, found_y2, dev = -1, -1, -1, 2 * width
+        for j in range(lo, hi):
+            if used_x2[j]:
+                continue
+            m = (x1[i] + x2[j] - tsum_x) / 2
+            iy1, iy2, d = _best_pair(y1, used_y1, y2, used_y2, m, tsum_y, width)
+            if iy1 >= 0 and d <= dev:
+                found_x2, found_y1, found_y2, dev = j, iy1, iy2, d
+        if found_x2 < 0:
+            continue
+        used_x1[i] = used_x2[found_x2] = used_y1[found_y1] = used_y2[found_y2] = True
+        out_t[n] = (x1[i] + x2[found_x2] - tsum_x) / 2 - t0
+        out_x[n] = x_scale * (x1[i] - x2[found_x2])
+        out_y[n] = y_scale * (y1[found_y1] - y2[found_y2])
+        out_method[n] = METHOD_MCP_RECOVERED
+        n += 1
+
+    # 3rd pass: hits missing one of the anode ends, which is recovered from the time sum. The lone end is checked
+    # only by the window, so it is taken only if it is the single unused candidate of the layer
+    for k in range(mcp.size):
+        if used_mcp[k]:
+            continue
+        m = mcp[k]
+        ix1, ix2, _ = _best_pair(x1, used_x1, x2, used_x2, m, tsum_x, width)
+        iy1, iy2, _ = _best_pair(y1, used_y1, y2, used_y2, m, tsum_y, width)
+        if ix1 >= 0 and iy1 < 0:
+            n1, iy1 = _count(y1, used_y1, m - width, m + tsum_y + width)
+            n2, iy2 = _count(y2, used_y2, m - width, m + tsum_y + width)
+            if not n1 + n2 == 1:
+                continue
+            if iy1 >= 0:
+                a, b, method = y1[iy1], tsum_y + 2 * m - y1[iy1], METHOD_Y2_RECOVERED
+            else:
+                a, b, method = tsum_y + 2 * m - y2[iy2], y2[iy2], METHOD_Y1_RECOVERED
+            used_mcp[k] = used_x1[ix1] = used_x2[ix2] = True
+            if iy1 >= 0:
+                used_y1[iy1] = True
+            else:
+                used_y2[iy2] = True
+            out_x[n] = x_scale * (x1[ix1] - x2[ix2])
+            out_y[n] = y_scale * (a - b)
+        elif ix1 < 0 and iy1 >= 0:
+            n1, ix1 = _count(x1, used_x1, m - width, m + tsum_x + width)
+            n2, ix2 = _count(x2, used_x2, m - width, m + tsum_x + width)
+            if not n1 + n2 == 1:
+                continue
+            if ix1 >= 0:
+                a, b, method = x1[ix1], tsum_x + 2 * m - x1[ix1], METHOD_X2_RECOVERED
+            else:
+                a, b, method = tsum_x + 2 * m - x2[ix2], x2[ix2], METHOD_X1_RECOVERED
+            used_mcp[k] = used_y1[iy1] = used_y2[iy2] = True
+            if ix1 >= 0:
+                used_x1[ix1] = True
+            else:
+                used_x2[ix2] = True
+            out_x[n] = x_scale * (a - b)
+            out_y[n] = y_scale * (y1[iy1] - y2[iy2])
+        else:
+            continue
+        out_t[n] = m - t0
+        out_method[n] = method
+        n += 1
+
+    # order hits by flight time
+    order = argsort(out_t[:n])
+    out_t[:n], out_x[:n], out_y[:n], out_method[:n] = \
+        out_t[:n][order], out_x[:n][order], out_y[:n][order], out_method[:n][order]
+    return n
+
+
+@jit(nopython=True, nogil=True, parallel=True)
+def _reconstruct(mcp: ndarray, mcp_offsets: ndarray, x1: ndarray, x1_offsets: ndarray,
+                 x2: ndarray, x2_offsets: ndarray, y1: ndarray, y1_offsets: ndarray,
+                 y2: ndarray, y2_offsets: ndarray,
+                 t0: float, tsum_x: float, tsum_y: float, width: float, x_scale: float, y_scale: float):
+    nevents = mcp_offsets.size - 1
+
+    # upper bound of num of hits: every mcp, plus the hits whose mcp are recovered
+    capacity = zeros(nevents + 1, dtype=int64)
+    for k in range(nevents):
+        capacity[k + 1] = capacity[k] + (mcp_offsets[k + 1] - mcp_offsets[k]) + min(
+            x1_offsets[k + 1] - x1_offsets[k], x2_offsets[k + 1] - x2_offsets[k],
+            y1_offsets[k + 1] - y1_offsets[k], y2_offsets[k + 1] - y2_offsets[k])
+    buf_t = empty(capacity[nevents], dtype=float64)
+    buf_x = empty(capacity[nevents], dtype=float64)
+    buf_y = empty(capacity[nevents], dtype=float64)
+    buf_method = empty(capacity[nevents], dtype=uint16)
+    nhits = zeros(nevents, dtype=int64)
+    for k in prange(nevents):
+        fr, to = capacity[k], capacity[k + 1]
+        nhits[k] = _reconstruct_event(mcp[mcp_offsets[k]:mcp_offsets[k + 1]],
+                                      x1[x1_offsets[k]:x1_offsets[k + 1]], x2[x2_offsets[k]:x2_offsets[k + 1]],
+                                      y1[y1_offsets[k]:y1_offsets[k + 1]], y2[y2_offsets[k]:y2_offsets[k + 1]],
+                                      t0, tsum_x, tsum_y, width, x_scale, y_scale,
+                                      buf_t[fr:to], buf_x[fr:to], buf_y[fr:to], buf_method[fr:to])
+
+    offsets = zeros(nevents + 1, dtype=int64)
+    offsets[1:] = cumsum(nhits)
+    t = empty(offsets[nevents], dtype=float64)
+    x = empty(offsets[nevents], dtype=float64)
+    y = empty(offsets[nevents], dtype=float64)
+    method = empty(offsets[nevents], dtype=uint16)
+    for k in prange(nevents):
+        fr, to, n = offsets[k], offsets[k + 1], nhits[k]
+        t[fr:to] = buf_t[capacity[k]:capacity[k] + n]
+        x[fr:to] = buf_x[capacity[k]:capacity[k] + n]
+        y[fr:to] = buf_y[capacity[k]:capacity[k] + n]
+        method[fr:to] = buf_method[capacity[k]:capacity[k] + n]
+    return offsets, nhits, t, x, y, method
+
+
+def reconstruct_hits(mcp: Tuple[ndarray, ndarray], x1: Tuple[ndarray, ndarray], x2: Tuple[ndarray, ndarray],
+                     y1: Tuple[ndarray, ndarray], y2: Tuple[ndarray, ndarray], *,
+                     t0: float = 0, tsum_x: float = None, tsum_y: float = None, tsum_width: float = None,
+                     x_scale: float = 1, y_scale: float = 1) -> dict:
+    """
+    Reconstruct hits of a delay-line detector from signal times of the mcp and the anode ends x1, x2, y1 and y2.
+    Each of signals is given in CSR form, a pair of (values, offsets), where the signals of the i-th event are
+    values[offsets[i]:offsets[i + 1]]. A set of signals is taken as a hit if the time sums x1 + x2 - 2 * mcp and
+    y1 + y2 - 2 * mcp are in `tsum_x` and `tsum_y` ± `tsum_width`. Hits lacking one anode end or the mcp are
+    recovered from the time sums afterwards, unless ambiguous, and flagged by the `method` codes METHOD_*.
+    Hits are returned in CSR form as well, in the units of the signals: t = mcp - t0, x = x_scale * (x1 - x2) and
+    y = y_scale * (y1 - y2).
+
+    Example:
+        d = reconstruct_hits((mcp, mcp_offsets), (x1, x1_offsets), (x2, x2_offsets),
+                             (y1, y1_offsets), (y2, y2_offsets),
+                             t0=10, tsum_x=120, tsum_y=118, tsum_width=2, x_scale=0.5, y_scale=0.5)
+        for i in range(len(d['nhits'])):
+            fr, to = d['offsets'][i], d['offsets'][i + 1]
+            print(d['t'][fr:to], d['x'][fr:to], d['y'][fr:to], d['method'][fr:to])
+            break
+    """
+    if tsum_x is None or tsum_y is None or tsum_width is None:
+        raise ValueError("Keyword argument 'tsum_x', 'tsum_y' and 'tsum_width' must be given!")
+    signals = tuple((asarray(v, dtype='float64'), asarray(o, dtype='int64')) for v, o in (mcp, x1, x2, y1, y2))
+    nevents = signals[0][1].size
+    for v, o in signals:
+        if not o.size == nevents:
+            raise ValueError('Not all the signals have the same num of events!')
+        if o.size == 0 or not (o[0] == 0 and o[-1] == v.size and (o[1:] >= o[:-1]).all()):
+            raise ValueError('Offsets must start with 0, be non-decreasing, and end with the num of values!')
+    offsets, nhits, t, x, y, method = _reconstruct(*(a for s in signals for a in s),
+                                                   t0, tsum_x, tsum_y, tsum_width, x_scale, y_scale)
+    return {'offsets': offsets, 'nhits': nhits, 't': t, 'x': x, 'y': y, 'method': method}
@@ -1,5 +1,7 @@
 # distutils: language=c++
 
+from itertools import repeat
+
 from cython cimport dict
 from libc.stdio cimport FILE, EOF, SEEK_SET, SEEK_CUR, SEEK_END, fopen, fclose, fread, fgetc, fseek, ftell
 from libcpp.pair cimport pair
@@ -76,6 +78,8 @@ cdef class LmaReader:
             for d in r:
                 print(d)
                 break
+        with LmaReader(filename) as r:
+            tags = [d['tag'] for d in r.read(mask=repeat(False))]  # read tags only
     """
     cdef:
         FILE * __file
@@ -260,8 +264,20 @@ cdef class LmaReader:
         self.__file = NULL
 
     def __iter__(self):
+        return self.read()
+
+    def read(self, mask=None):
+        """
+        Pulses of an event are skipped without decoding, if the event is masked out by `mask`, a sequence of bools
+        for each event in the file order; then only the tag is returned. Raises ValueError if `mask` is shorter than
+        the file.
+        """
         cdef npy_int32 ret
 
+        if mask is None:
+            mask = repeat(True)
+        mask = iter(mask)
+
         if not self.__file:
             raise IOError("File is closed!")
 
@@ -273,9 +289,50 @@ cdef class LmaReader:
             ret = fseek(self.__file, -1, SEEK_CUR)
             if not ret == 0:
                 raise IOError("Fail to seek a position: {}!".format(ret))
-            yield self.__next()
+            try:
+                selected = next(mask)
+            except StopIteration:
+                raise ValueError('Mask is shorter than the num of events in the file!') from None
+            if selected:
+                yield self.__next()
+            else:
+                yield self.__skip()
         return
 
+    cdef dict __skip(self):
+        cdef:
+            npy_int16 dump_int16
+            npy_int32 ret, tag, m, i, j, k[2]
+
+        # event[0] int32
+        ret = fread(&tag, 4, 1, self.__file)
+        if not ret == 1:
+            raise IOError("Fail to read a block: {}!".format(ret))
+
+        # event[1] float64
+        ret = fseek(self.__file, 8, SEEK_CUR)
+        if not ret == 0:
+            raise IOError("Fail to seek a position: {}!".format(ret))
+
+        for i in range(self.__nchannels):
+            # event[2] int16
+            ret = fread(&dump_int16, 2, 1, self.__file)
+            if not ret == 1:
+                raise IOError("Fail to read a block: {}!".format(ret))
+            m = dump_int16
+
+            for j in range(m):
+                # event[3] int32
+                ret = fread(&k, 4, 2, self.__file)
+                if not ret == 2:
+                    raise IOError("Fail to read a block: {}!".format(ret))
+
+                # event[4] int16
+                ret = fseek(self.__file, 2 * k[1], SEEK_CUR)
+                if not ret == 0:
+                    raise IOError("Fail to seek a position: {}!".format(ret))
+        return {"tag": tag}
+
     cdef dict __next(self):
         cdef:
             npy_int16 dump_int16
@@ -1,10 +1,10 @@
 from typing import Tuple, Sequence, Generator, Mapping, Callable, Optional
 
 from cytoolz import memoize, partial, concat, pipe, map
-from numpy import fromiter, ndarray
+from numpy import fromiter, ndarray, asarray, argsort, searchsorted, diff, repeat, full, zeros, nan
 from pandas import DataFrame
 
-__all__ = ['tags_at', 'scalars_at', 'ArrReader']
+__all__ = ['tags_at', 'scalars_at', 'join_scalars', 'ArrReader']
 
 
 def hightag(*args, **kwargs):
@@ -70,6 +70,49 @@ def scalars_at(run_or_tag: int, *other_runs_or_tags: int, beamline: int = None,
     return DataFrame(scalars, index=tags)
 
 
+def join_scalars(tags: Sequence[int], scalars: DataFrame, offsets: Sequence[int] = None) -> dict:
+    """
+    Align `scalars`, a DataFrame indexed by tags such as the one of `scalars_at`, to `tags` of events from any reader.
+    The tags are looked up by bisection over the sorted index of `scalars`; the tags of events may be in any order
+    and may duplicate, while the index must be unique. Returns each column as an array for each event, together with
+    the tags and a mask 'missing' of the tags not found in `scalars`. Values at missing tags are NaN if the column is
+    float, otherwise zero (False for bool columns). If CSR `offsets` of hits are given, where the hits of the i-th
+    event are hits[offsets[i]:offsets[i + 1]], everything is broadcast for each hit instead.
+
+    Example:
+        tags = [d['tag'] for d in hit_reader('aq137.hit', mask=repeat(False))]  # read tags only
+        df = scalars_at(*tags, hightag=201704, equips=equips)
+        meta = join_scalars(tags, df)
+        shots = ~meta['missing'] & meta['fel_status'] & meta['laser_shutter']
+        for d in hit_reader('aq137.hit', mask=shots):
+            print(d)
+            break
+    """
+    tags = asarray(tags, dtype='int64')
+    index = scalars.index.values.astype('int64')
+    order = argsort(index, kind='mergesort')
+    sorted_index = index[order]
+    if (sorted_index[1:] == sorted_index[:-1]).any():
+        raise ValueError('Not all the tags of scalars are unique!')
+    at = searchsorted(sorted_index, tags)
+    found = at < sorted_index.size
+    found[found] = sorted_index[at[found]] == tags[found]
+    rows = order[at[found]]
+
+    joined = {'tag': tags, 'missing': ~found}
+    for k in scalars:
+        col = scalars[k].values
+        joined[k] = full(tags.size, nan) if col.dtype.kind == 'f' else zeros(tags.size, dtype=col.dtype)
+        joined[k][found] = col[rows]
+    if offsets is None:
+        return joined
+
+    nhits = diff(asarray(offsets, dtype='int64'))
+    if not nhits.size == tags.size:
+        raise ValueError('Num of tags and of offsets do not match!')
+    return {k: repeat(v, nhits) for k, v in joined.items()}
+
+
 StorageReader: Optional[Callable] = None
 StorageBuffer: Optional[Callable] = None
 APIError: Optional[Callable] = None
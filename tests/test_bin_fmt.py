@@ -0,0 +1,34 @@
+from itertools import repeat
+from struct import pack
+
+from pytest import raises
+
+from saclatools.bin_fmt import hit_reader, bin_reader
+
+
+def test_hit_reader_mask(tmp_path):
+    filename = str(tmp_path / 'a.hit')
+    with open(filename, 'bw') as f:
+        for tag, nhits in ((10, 2), (11, 0), (12, 1)):
+            f.write(pack('=IH', tag, nhits))
+            for i in range(nhits):
+                f.write(pack('=dddH', i, i, i, 0))
+    assert [d['nhits'] for d in hit_reader(filename)] == [2, 0, 1]
+    assert [d for d in hit_reader(filename, mask=repeat(False))] == [
+        {'tag': 10, 'nhits': 2}, {'tag': 11, 'nhits': 0}, {'tag': 12, 'nhits': 1}]
+    assert ['hits' in d for d in hit_reader(filename, mask=[False, True, True])] == [False, True, True]
+    with raises(ValueError):
+        list(hit_reader(filename, mask=[True, True]))
+
+
+def test_bin_reader_mask(tmp_path):
+    filename = str(tmp_path / 'a.bin')
+    with open(filename, 'bw') as f:
+        for tag, nhits in ((10, 2), (11, 1)):
+            f.write(pack('=IBBBBddddI', tag, 1, 1, 1, 0, 0, 0, 0, 0, nhits))
+            for i in range(nhits):
+                f.write(pack('=ddd', i, i, i))
+    assert [len(d['hits']) for d in bin_reader(filename)] == [2, 1]
+    assert ['hits' in d for d in bin_reader(filename, mask=[False, True])] == [False, True]
+    with raises(ValueError):
+        list(bin_reader(filename, mask=[False]))
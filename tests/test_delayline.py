@@ -0,0 +1,67 @@
+from numpy import array, concatenate, cumsum, argmin
+from numpy.random import default_rng
+
+from saclatools.delayline import (reconstruct_hits, METHOD_COMPLETE, METHOD_X1_RECOVERED, METHOD_X2_RECOVERED,
+                                  METHOD_Y1_RECOVERED, METHOD_Y2_RECOVERED, METHOD_MCP_RECOVERED)
+
+tsum_x, tsum_y, width = 100, 90, 1
+
+
+def signals_of(events):
+    """
+    Signals of hits (t, x, y) in CSR form; an event is a list of hits with a set of the names of the dropped signals
+    """
+    signals = {k: [] for k in ('mcp', 'x1', 'x2', 'y1', 'y2')}
+    for hits in events:
+        found = {k: [] for k in signals}
+        for (t, x, y), dropped in hits:
+            for k, v in (('mcp', t), ('x1', t + (tsum_x + x) / 2), ('x2', t + (tsum_x - x) / 2),
+                         ('y1', t + (tsum_y + y) / 2), ('y2', t + (tsum_y - y) / 2)):
+                if k not in dropped:
+                    found[k].append(v)
+        for k in signals:
+            signals[k].append(array(found[k], dtype='float64'))
+    return tuple((concatenate(v), concatenate([[0], cumsum([len(a) for a in v])])) for v in signals.values())
+
+
+def reconstruct(events):
+    return reconstruct_hits(*signals_of(events), tsum_x=tsum_x, tsum_y=tsum_y, tsum_width=width)
+
+
+def test_recovered_hits():
+    hits = (10, 20, -30), (500, -40, 10)
+    for dropped, method in (((), METHOD_COMPLETE),
+                            (('x1',), METHOD_X1_RECOVERED), (('x2',), METHOD_X2_RECOVERED),
+                            (('y1',), METHOD_Y1_RECOVERED), (('y2',), METHOD_Y2_RECOVERED),
+                            (('mcp',), METHOD_MCP_RECOVERED)):
+        d = reconstruct([[(hits[0], ()), (hits[1], set(dropped))]])
+        assert d['offsets'].tolist() == [0, 2]
+        assert d['method'].tolist() == [METHOD_COMPLETE, method]
+        assert d['t'].tolist() == [10, 500]
+        assert d['x'].tolist() == [20, -40]
+        assert d['y'].tolist() == [-30, 10]
+
+
+def test_ambiguous_anode_is_not_recovered():
+    # both lone x1s are in the window of the first mcp, which has no x2
+    d = reconstruct([[((0, 20, 0), {'x2'}), ((20, 0, 10), {'mcp', 'x2'})]])
+    assert d['nhits'].tolist() == [0]
+
+
+def test_close_hits_with_dropped_signals():
+    rng = default_rng(0)
+    events, truth = [], []
+    for _ in range(200):
+        # hits closer than the dead time of the detector cannot be told apart
+        hits = [(t, x, y) for t, x, y in zip(cumsum(rng.uniform(10, 400, 5)),
+                                             rng.uniform(-45, 45, 5), rng.uniform(-40, 40, 5))]
+        dropped = [{k for k in ('mcp', 'x1', 'x2', 'y1', 'y2') if rng.uniform() < 0.1} for _ in hits]
+        events.append(list(zip(hits, dropped)))
+        truth.append(array(hits))
+    d = reconstruct(events)
+    assert (d['method'] != METHOD_COMPLETE).any()
+    for i, hits in enumerate(truth):
+        fr, to = d['offsets'][i], d['offsets'][i + 1]
+        for t, x, y in zip(d['t'][fr:to], d['x'][fr:to], d['y'][fr:to]):
+            t_, x_, y_ = hits[argmin(abs(hits[:, 0] - t))]
+            assert abs(t - t_) < width and abs(x - x_) < 2 * width and abs(y - y_) < 2 * width
@@ -0,0 +1,36 @@
+from itertools import repeat
+from struct import pack
+
+from pytest import raises
+
+from saclatools.lma_fmt import LmaReader
+
+
+def write_lma(filename, events):
+    """
+    Write a LMA file of 2 channels, 4 samples; an event is a pair of tag and partial pulses (first index, pulse) for
+    each channel
+    """
+    channel = pack('=hhdhhii', 0, 0, 2.0, 1, 0, 0, 0)
+    header = pack('=hhdidhdhIIh', 2, 2, 1.0, 4, 0, 0, 0, 0, 0b11, 0, 0) + 2 * channel
+    with open(filename, 'bw') as f:
+        f.write(pack('=i', len(header)) + header)
+        for tag, channels in events:
+            f.write(pack('=id', tag, 0))
+            for pulses in channels:
+                f.write(pack('=h', len(pulses)))
+                for first, pulse in pulses:
+                    f.write(pack('=ii', first, len(pulse)) + pack('={}h'.format(len(pulse)), *pulse))
+
+
+def test_lma_reader_mask(tmp_path):
+    filename = str(tmp_path / 'a.lma')
+    write_lma(filename, [(10, [[(1, [2, 3])], []]), (11, [[], [(0, [1, 1, 1, 5])]]), (12, [[], []])])
+    with LmaReader(filename) as r:
+        assert [d['channel0'].tolist() for d in r] == [[0, 2, 4, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+        assert [d['channel1'].tolist() for d in r] == [[0, 0, 0, 0], [0, 0, 0, 8], [0, 0, 0, 0]]
+        assert list(r.read(mask=repeat(False))) == [{'tag': 10}, {'tag': 11}, {'tag': 12}]
+        assert [sorted(d) for d in r.read(mask=[False, True, False])] == [
+            ['tag'], ['channel0', 'channel1', 'tag'], ['tag']]
+        with raises(ValueError):
+            list(r.read(mask=[True, True]))
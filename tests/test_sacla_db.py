@@ -0,0 +1,46 @@
+from numpy import isnan
+from pandas import DataFrame
+from pytest import raises
+
+from saclatools.sacla_db import join_scalars
+
+
+def scalars():
+    return DataFrame({'fel_status': [True, False, True], 'nshots': [3, 1, 2], 'fel_intensity': [0.3, 0.1, 0.2]},
+                     index=[30, 10, 20])
+
+
+def test_join_scalars():
+    joined = join_scalars([20, 10, 20, 30], scalars())
+    assert joined['tag'].tolist() == [20, 10, 20, 30]
+    assert joined['missing'].tolist() == [False, False, False, False]
+    assert joined['fel_status'].tolist() == [True, False, True, True]
+    assert joined['nshots'].tolist() == [2, 1, 2, 3]
+    assert joined['fel_intensity'].tolist() == [0.2, 0.1, 0.2, 0.3]
+
+
+def test_join_scalars_at_missing_tags():
+    joined = join_scalars([40, 10, 5], scalars())
+    assert joined['missing'].tolist() == [True, False, True]
+    assert joined['fel_status'].tolist() == [False, False, False]
+    assert joined['nshots'].tolist() == [0, 1, 0]
+    assert isnan(joined['fel_intensity'][[0, 2]]).all()
+    assert joined['fel_intensity'][1] == 0.1
+
+
+def test_join_scalars_with_duplicated_index():
+    df = DataFrame({'fel_status': [True, False]}, index=[10, 10])
+    with raises(ValueError):
+        join_scalars([10], df)
+
+
+def test_join_scalars_for_each_hit():
+    joined = join_scalars([30, 40, 10], scalars(), offsets=[0, 2, 2, 3])  # no hit at tag 40
+    assert joined['tag'].tolist() == [30, 30, 10]
+    assert joined['missing'].tolist() == [False, False, False]
+    assert joined['nshots'].tolist() == [3, 3, 1]
+    assert joined['fel_intensity'].tolist() == [0.3, 0.3, 0.1]
+    joined = join_scalars([40, 10], scalars(), offsets=[0, 1, 2])
+    assert joined['missing'].tolist() == [True, False]
+    with raises(ValueError):
+        join_scalars([30, 10], scalars(), offsets=[0, 2])